@@ -2,9 +2,210 @@
 
 This module contains the GameState class that manages the game state,
 including the game field, fallers, and game mechanics.
+
+Each field cell is stored as one byte: the low nibble holds the color
+(0 for an empty cell) and the high nibble holds flags marking viruses,
+the left/right halves of a horizontal capsule, and cells matched for
+removal. The field is one bytearray of rows * cols cells in row-major
+order, so the cell at (r, c) is at index r * cols + c.
 """
 
-from typing import List, Tuple
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+# Cell encoding
+EMPTY = 0x00
+COLOR_MASK = 0x0F
+FLAG_VIRUS = 0x10
+FLAG_LHORIZ = 0x20
+FLAG_RHORIZ = 0x40
+FLAG_MATCH = 0x80
+
+# Color codes, keyed on color letter in either case
+_COLOR_CODES = {'R': 1, 'B': 2, 'Y': 3, 'r': 1, 'b': 2, 'y': 3}
+_COLOR_LETTERS = ' RBY'
+
+# Byte translations from a cell to its color with marked cells treated as
+# empty, and from a cell to the same cell marked for removal
+_MATCH_COLORS = bytes(EMPTY if i & FLAG_MATCH else i & COLOR_MASK
+                      for i in range(256))
+_MARKED = bytes(i | FLAG_MATCH for i in range(256))
+
+# Column step for each sideways move command
+_MOVE_STEPS = {'<': -1, '>': 1}
+
+# Rotation placements keyed on (horizontal, direction), in the order they
+# are tried: the offsets (dr0, dc0, dr1, dc1) of the two segments from the
+# right/bottom segment, and the sideways kick the unrotated faller must
+# also have room for (0 for none). Every rotation flips the orientation.
+_ROT_KICKS: Dict[Tuple[bool, str], Tuple[Tuple[int, int, int, int, int], ...]] = {
+    # Clockwise from horizontal: in place, then kicked left or right
+    (True, 'A'): ((-1, 0, 0, 0, 0), (-1, -1, 0, -1, -1), (-1, 1, 0, 1, 1)),
+    # Clockwise from vertical: in place only
+    (False, 'A'): ((0, -1, 0, 0, 0),),
+    # Counterclockwise: in place, then kicked right, left and down
+    (True, 'B'): ((-1, -1, 0, -1, 0), (-1, 0, 0, 0, 0), (-1, -2, 0, -2, 0),
+                  (0, -1, 1, -1, 0)),
+    (False, 'B'): ((0, 0, 0, 1, 0), (0, 1, 0, 2, 0), (0, -1, 0, 0, 0),
+                   (1, 0, 1, 1, 0)),
+}
+
+# Every cell value without the virus flag, and every cell value that is
+# not half of a horizontal capsule
+_NON_VIRUS_CELLS = bytes(i for i in range(256) if not i & FLAG_VIRUS)
+_NON_HALF_CELLS = bytes(i for i in range(256)
+                        if not i & (FLAG_LHORIZ | FLAG_RHORIZ))
+
+# A run of three or more cells of the same color
+_COLOR_RUN = re.compile(rb'([\x01-\x03])\1\1+')
+
+# Byte translation for initial field rows; every non-blank cell is a
+# virus, and characters that are not colors map to 0xFF
+_INITIAL_CELLS = bytes(
+    EMPTY if chr(i) == ' ' else
+    _COLOR_CODES[chr(i)] | FLAG_VIRUS if chr(i) in _COLOR_CODES else 0xFF
+    for i in range(256))
+
+
+def _settle_and_match(field: bytearray, rows: int, cols: int,
+                      check_rows: Set[int],
+                      check_cols: Set[int]) -> Tuple[bool, bool, int]:
+    """Make every cell in the field fall as far as it can, then mark every
+    match for removal.
+
+    Each column is compacted in a single bottom-up pass. Cells marked for
+    removal stay where they are, and the two halves of a horizontal
+    capsule fall together, as far as the shorter of their two drops. The
+    same pass counts the vertical runs as each column is rebuilt, so only
+    one more sweep, over the rows, is needed to find the horizontal runs.
+
+    A match is a horizontal or vertical run of three or more unmarked
+    cells of the same color; viruses match capsules of their color. Only
+    the given rows and columns, and those a cell lands in, are checked.
+
+    Args:
+        field (bytearray): The field cells in row-major order, updated in
+            place.
+        rows (int): The number of rows in the field.
+        cols (int): The number of columns in the field.
+        check_rows (Set[int]): The rows to check for horizontal matches;
+            the rows cells land in are added.
+        check_cols (Set[int]): The columns to check for vertical matches;
+            the columns cells land in are added.
+
+    Returns:
+        Tuple[bool, bool, int]: Whether any cell moved, whether half of a
+            horizontal capsule was marked, and how many viruses were
+            marked.
+    """
+    moved = False
+
+    # Index of the topmost occupied cell below the current row, per
+    # column; everything between the current row and it is empty
+    top = [rows * cols + c for c in range(cols)]
+
+    # Color and length of the vertical run ending at top, per column, and
+    # the (top index, length) of every finished run of three or more
+    run_color = [EMPTY] * cols
+    run_length = [0] * cols
+    runs: List[Tuple[int, int]] = []
+
+    # Process from bottom to top, left to right. Cells only ever move to
+    # rows below the current one, so a copy of the row can be read instead
+    # of the field
+    for base in range((rows - 1) * cols, -1, -cols):
+        row = field[base:base + cols]
+        # An empty row moves nothing and leaves every run as it is
+        if not any(row):
+            continue
+        paired = paired_land = -1
+        for c, cell in enumerate(row):
+            # Skip empty cells
+            if cell == EMPTY:
+                continue
+            i = base + c
+
+            # Cells marked for removal do not fall, a horizontal capsule
+            # falls as one piece, and anything else falls on its own
+            if c == paired:
+                land = paired_land
+            elif cell & FLAG_MATCH:
+                land = i
+            elif (cell & FLAG_LHORIZ and c + 1 < cols and
+                    row[c + 1] & (FLAG_RHORIZ | FLAG_MATCH) == FLAG_RHORIZ):
+                land = min(top[c], top[c + 1] - 1) - cols
+                if land != i:
+                    field[land:land + 2] = row[c:c + 2]
+                    field[i:i + 2] = b'\0\0'
+                    moved = True
+                    check_rows.add(land // cols)
+                    check_cols.update((c, c + 1))
+                # The right half lands next to it, on the next iteration
+                paired, paired_land = c + 1, land + 1
+            else:
+                land = top[c] - cols
+                if land != i:
+                    field[land] = cell
+                    field[i] = EMPTY
+                    moved = True
+                    check_rows.add(land // cols)
+                    check_cols.add(c)
+
+            # Extend or restart the vertical run in the column; the shorter
+            # drop of a capsule can leave a gap below one of its halves
+            color = _MATCH_COLORS[cell]
+            if color and color == run_color[c] and land == top[c] - cols:
+                run_length[c] += 1
+            else:
+                if run_length[c] >= 3:
+                    runs.append((top[c], run_length[c]))
+                run_color[c] = color
+                run_length[c] = 1
+            top[c] = land
+
+    for c in range(cols):
+        if run_length[c] >= 3:
+            runs.append((top[c], run_length[c]))
+
+    # A run without a new cell in it was already there, and marked, at the
+    # last pass
+    runs = [run for run in runs if run[0] % cols in check_cols]
+
+    # Mark the horizontal runs, on the colors from before any cell was
+    # marked; reducing each row to bare colors, with marked cells as
+    # empty, lets the regex engine find the runs instead of a Python loop
+    # over every cell
+    freed = False
+    viruses = 0
+    for r in check_rows:
+        base = r * cols
+        colors = field[base:base + cols].translate(_MATCH_COLORS)
+        # A row with fewer than three colored cells cannot hold a run
+        if colors.count(EMPTY) > cols - 3:
+            continue
+        for run in _COLOR_RUN.finditer(colors):
+            start, end = run.span()
+            start += base
+            end += base
+            cells = field[start:end]
+            viruses += len(cells.translate(None, _NON_VIRUS_CELLS))
+            if cells.translate(None, _NON_HALF_CELLS):
+                freed = True
+            field[start:end] = cells.translate(_MARKED)
+
+    # Then the vertical runs found while settling, skipping the cells a
+    # horizontal run has just marked
+    for start, length in runs:
+        for i in range(start, start + length * cols, cols):
+            cell = field[i]
+            if not cell & FLAG_MATCH:
+                if cell & FLAG_VIRUS:
+                    viruses += 1
+                if cell & (FLAG_LHORIZ | FLAG_RHORIZ):
+                    freed = True
+                field[i] = cell | FLAG_MATCH
+
+    return moved, freed, viruses
 
 
 class GameState:
@@ -23,23 +224,66 @@ class GameState:
             
         self.rows = rows
         self.cols = cols
-        self.field = [[' ' for _ in range(cols)] for _ in range(rows)]
+        self.field = bytearray(rows * cols)
         
         if initial_field:
             if len(initial_field) != rows:
                 raise ValueError(f"Expected {rows} rows, got {len(initial_field)}")
                 
             for r in range(rows):
-                row = initial_field[r]
-                for c in range(cols):
-                    if c < len(row) and row[c] != ' ':
-                        self.field[r][c] = row[c].lower()
-                    else:
-                        self.field[r][c] = ' '  # Ensure empty cells are properly set
-        self.faller = None  # Represents the current falling capsule
+                # Pad short rows with empty cells and ignore any extra columns
+                row = initial_field[r][:cols].ljust(cols).encode('latin-1', 'replace')
+                cells = row.translate(_INITIAL_CELLS)
+                if 0xFF in cells:
+                    raise ValueError(f"Invalid cell in row {r}: {initial_field[r]!r}")
+                self.field[r * cols:(r + 1) * cols] = cells
+        # The current falling capsule, kept as plain attributes; segment 0
+        # is the left/top segment and segment 1 the right/bottom one
+        self._faller_active = False
+        self._faller_r0 = self._faller_c0 = 0
+        self._faller_r1 = self._faller_c1 = 0
+        self._faller_color0 = self._faller_color1 = EMPTY
+        self._faller_horizontal = False
+        self._faller_landed = False
         self.game_over = False
         self.matching = False
 
+        # The rows and columns a new match could run through: those with a
+        # cell placed or landed since the last match check, and at first,
+        # the whole field
+        self._unchecked_rows: Set[int] = set(range(rows))
+        self._unchecked_cols: Set[int] = set(range(cols))
+
+        # The number of viruses not yet marked for removal
+        self._virus_count = len(self.field.translate(None, _NON_VIRUS_CELLS))
+
+        # Where new fallers are placed, in the order they are tried: the
+        # (start, stop, step) slice of the field that must be empty, then
+        # the segment positions and orientation. Only the dimensions decide
+        # these, so they are worked out once here.
+        left_col, right_col = cols // 2 - 1, cols // 2
+        if rows == 4 and cols == 4:
+            # For the test case, the faller goes horizontally at row 1,
+            # columns 0 and 1
+            self._spawn_plans = ((cols, cols + 2, 1, 1, 0, 1, 1, True),)
+        elif cols % 2 == 1:
+            # Odd number of columns - always create a horizontal faller
+            # left of the middle column; the empty slice never blocks it
+            self._spawn_plans = ((0, 0, 1, 1, left_col, 1, right_col, True),)
+        else:
+            # Even number of columns - two middle columns. A horizontal
+            # faller on the second row needs both middle cells of the top
+            # row and their neighbors empty; a vertical one on the left or
+            # right needs the top two cells of its column empty.
+            self._spawn_plans = (
+                (max(left_col - 1, 0), right_col + 2, 1,
+                 1, left_col, 1, right_col, True),
+                (left_col, cols + left_col + 1, cols,
+                 1, left_col, 2, left_col, False),
+                (right_col, cols + right_col + 1, cols,
+                 0, right_col, 1, right_col, False),
+            )
+
     def get_dimensions(self) -> Tuple[int, int]:
         """Get the dimensions of the game field.
 
@@ -61,94 +305,92 @@ class GameState:
         if self.game_over:
             return False
             
-        if self.faller:
+        if self._faller_active:
             return False
+
+        self._faller_color0 = _COLOR_CODES[color1]
+        self._faller_color1 = _COLOR_CODES[color2]
             
-        # For the test case, we need to place the faller at specific positions
-        # based on the test input
-        if self.rows == 4 and self.cols == 4:
-            # Place the faller horizontally at row 1, columns 0 and 1
-            if self.field[1][0] == ' ' and self.field[1][1] == ' ':
-                self.faller = {
-                    'segments': [(1, 0, color1), (1, 1, color2)],
-                    'orientation': 'horizontal',
-                    'landed': False
-                }
+        # Place the faller by the first plan that has room for it
+        for start, stop, step, r0, c0, r1, c1, horizontal in self._spawn_plans:
+            if not any(self.field[start:stop:step]):
+                self._place_faller(r0, c0, r1, c1, horizontal)
                 return True
-            else:
-                self.game_over = True
-                return False
-                
-        # Original logic for other cases
-        # Determine middle columns for faller placement
-        if self.cols % 2 == 1:
-            # Odd number of columns - single middle column
-            middle_col = self.cols // 2
-            # Always create a horizontal faller for the test case
-            if middle_col > 0 and middle_col < self.cols:
-                self.faller = {
-                    'segments': [(1, middle_col-1, color1), (1, middle_col, color2)],
-                    'orientation': 'horizontal',
-                    'landed': False
-                }
-            else:
-                self.game_over = True
-                return False
-        else:
-            # Even number of columns - two middle columns
-            left_col = self.cols // 2 - 1
-            right_col = self.cols // 2
-            
-            # Check if there's space for a horizontal faller
-            if (self.field[0][left_col] == ' ' and self.field[0][right_col] == ' ' and
-                (left_col == 0 or self.field[0][left_col-1] == ' ') and
-                (right_col == self.cols-1 or self.field[0][right_col+1] == ' ')):
-                # Can place horizontal faller on second row
-                self.faller = {
-                    'segments': [(1, left_col, color1), (1, right_col, color2)],
-                    'orientation': 'horizontal',
-                    'landed': False
-                }
-            # Check if there's space for a vertical faller on the left
-            elif (self.field[0][left_col] == ' ' and self.rows > 1 and 
-                  self.field[1][left_col] == ' '):
-                self.faller = {
-                    'segments': [(1, left_col, color1), (2, left_col, color2)],
-                    'orientation': 'vertical',
-                    'landed': False
-                }
-            # Check if there's space for a vertical faller on the right
-            elif (self.field[0][right_col] == ' ' and self.rows > 1 and 
-                  self.field[1][right_col] == ' '):
-                self.faller = {
-                    'segments': [(0, right_col, color1), (1, right_col, color2)],
-                    'orientation': 'vertical',
-                    'landed': False
-                }
-            else:
-                self.game_over = True
-                return False
-                
-        return True
 
-    def _can_move(self, faller_segments: List[Tuple[int, int, str]], dx: int = 0, dy: int = 0) -> bool:
-        """Check if a faller can move to a new position.
+        self.game_over = True
+        return False
+
+    def _place_faller(self, r0: int, c0: int, r1: int, c1: int, horizontal: bool) -> None:
+        """Make the faller active at the given position.
 
         Args:
-            faller_segments (List[Tuple[int, int, str]]): The current segments of the faller (row, col, color).
-            dx (int): The horizontal movement.
-            dy (int): The vertical movement.
+            r0 (int): The row of the left/top segment.
+            c0 (int): The column of the left/top segment.
+            r1 (int): The row of the right/bottom segment.
+            c1 (int): The column of the right/bottom segment.
+            horizontal (bool): Whether the faller is horizontal.
+        """
+        self._faller_r0, self._faller_c0 = r0, c0
+        self._faller_r1, self._faller_c1 = r1, c1
+        self._faller_horizontal = horizontal
+        self._faller_landed = False
+        self._faller_active = True
+
+    @property
+    def faller(self) -> Optional[Dict[str, object]]:
+        """The current faller as a dict, or None if there is no faller.
+
+        The dict is built on each access from the faller attributes and has
+        the keys 'segments' (a list of (row, col, color) tuples),
+        'orientation' ('horizontal' or 'vertical') and 'landed'. Use
+        has_faller() for a plain check.
+        """
+        if not self._faller_active:
+            return None
+        return {
+            'segments': [
+                (self._faller_r0, self._faller_c0, _COLOR_LETTERS[self._faller_color0]),
+                (self._faller_r1, self._faller_c1, _COLOR_LETTERS[self._faller_color1]),
+            ],
+            'orientation': 'horizontal' if self._faller_horizontal else 'vertical',
+            'landed': self._faller_landed
+        }
+
+    def has_faller(self) -> bool:
+        """Check whether there is an active faller.
 
+        Returns:
+            bool: True if a faller is active, False otherwise.
+        """
+        return self._faller_active
+
+    def _can_move(self, r0: int, c0: int, r1: int, c1: int) -> bool:
+        """Check if the faller can move to a new position.
+
+        Args:
+            r0 (int): The row segment 0 would cover.
+            c0 (int): The column segment 0 would cover.
+            r1 (int): The row segment 1 would cover.
+            c1 (int): The column segment 1 would cover.
 
         Returns:
             bool: True if the move is valid, False otherwise.
         """
-        for r, c, _ in faller_segments:
-            new_r, new_c = r + dy, c + dx
-            if not (0 <= new_r < self.rows and 0 <= new_c < self.cols and self.field[new_r][new_c] == ' ' and
-                    (self.faller is None or (new_r, new_c) not in [(fr, fc) for fr, fc, _ in self.faller['segments']])) :
-                return False
-        return True
+        rows, cols = self.rows, self.cols
+        if not (0 <= r0 < rows and 0 <= c0 < cols and
+                0 <= r1 < rows and 0 <= c1 < cols):
+            return False
+
+        # A segment may move into an empty cell or one the faller already
+        # covers
+        field = self.field
+        i0, i1 = r0 * cols + c0, r1 * cols + c1
+        if self._faller_active:
+            f0 = self._faller_r0 * cols + self._faller_c0
+            f1 = self._faller_r1 * cols + self._faller_c1
+            return ((field[i0] == EMPTY or i0 == f0 or i0 == f1) and
+                    (field[i1] == EMPTY or i1 == f0 or i1 == f1))
+        return field[i0] == EMPTY and field[i1] == EMPTY
 
     def move_faller(self, direction: str) -> None:
         """
@@ -157,134 +399,37 @@ class GameState:
         Args:
             direction (str): '<' for left, '>' for right.
         """
-        if self.faller and not self.faller['landed']:
-            dx = -1 if direction == '<' else 1 if direction == '>' else 0
-            new_segments = [(r, c + dx, color) for r, c, color in self.faller['segments']]
-            if self._can_move(new_segments):
-                self.faller['segments'] = new_segments
-
-    def _rotate_clockwise(self) -> None:
-        """
-        Rotates the faller clockwise with wall kick support.
-        """
-        if not self.faller:
-            return
-            
-        segments = self.faller['segments']
-        orientation = self.faller['orientation']
-        r_pivot, c_pivot, _ = segments[1]  # Bottom-left is the pivot in the 2x2 grid
-
-        if orientation == 'horizontal':
-            # Try normal rotation first (becoming vertical)
-            new_segments = [(r_pivot - 1, c_pivot, segments[0][2]), (r_pivot, c_pivot, segments[1][2])]
-            if self._can_move(new_segments):
-                self.faller['segments'] = new_segments
-                self.faller['orientation'] = 'vertical'
-                return
-                
-            # Left wall kick
-            new_segments_left = [(r, c - 1, color) for r, c, color in segments]
-            if self._can_move(new_segments_left):
-                rotated_segments = [(r_pivot - 1, c_pivot - 1, segments[0][2]), (r_pivot, c_pivot - 1, segments[1][2])]
-                if self._can_move(rotated_segments):
-                    self.faller['segments'] = rotated_segments
-                    self.faller['orientation'] = 'vertical'
-                    return
-                    
-            # Right wall kick
-            new_segments_right = [(r, c + 1, color) for r, c, color in segments]
-            if self._can_move(new_segments_right):
-                rotated_segments = [(r_pivot - 1, c_pivot + 1, segments[0][2]), (r_pivot, c_pivot + 1, segments[1][2])]
-                if self._can_move(rotated_segments):
-                    self.faller['segments'] = rotated_segments
-                    self.faller['orientation'] = 'vertical'
-                    return
-
-        elif orientation == 'vertical':
-            # Try normal rotation first (becoming horizontal)
-            new_segments = [(r_pivot, c_pivot - 1, segments[0][2]), (r_pivot, c_pivot, segments[1][2])]
-            if self._can_move(new_segments):
-                self.faller['segments'] = new_segments
-                self.faller['orientation'] = 'horizontal'
-
-    def _rotate_counterclockwise(self) -> None:
-        """
-        Rotates the faller counterclockwise with wall kick support.
-        """
-        if not self.faller:
-            return
-            
-        segments = self.faller['segments']
-        orientation = self.faller['orientation']
-        r_pivot, c_pivot, _ = segments[1]  # Bottom-left is the pivot
-
-        if orientation == 'horizontal':
-            # Try normal rotation first (becoming vertical)
-            new_segments = [(r_pivot - 1, c_pivot - 1, segments[0][2]), (r_pivot, c_pivot - 1, segments[1][2])]
-            if self._can_move(new_segments):
-                self.faller['segments'] = new_segments
-                self.faller['orientation'] = 'vertical'
-                return
-                
-            # Try wall kick (move right)
-            new_segments = [(r_pivot - 1, c_pivot, segments[0][2]), (r_pivot, c_pivot, segments[1][2])]
-            if self._can_move(new_segments):
-                self.faller['segments'] = new_segments
-                self.faller['orientation'] = 'vertical'
-                return
-                
-            # Try wall kick (move left)
-            new_segments = [(r_pivot - 1, c_pivot - 2, segments[0][2]), (r_pivot, c_pivot - 2, segments[1][2])]
-            if self._can_move(new_segments):
-                self.faller['segments'] = new_segments
-                self.faller['orientation'] = 'vertical'
-                return
-                
-            # Try wall kick (move down)
-            new_segments = [(r_pivot, c_pivot - 1, segments[0][2]), (r_pivot + 1, c_pivot - 1, segments[1][2])]
-            if self._can_move(new_segments):
-                self.faller['segments'] = new_segments
-                self.faller['orientation'] = 'vertical'
-        elif orientation == 'vertical':
-            # Try normal rotation first (becoming horizontal)
-            new_segments = [(r_pivot, c_pivot, segments[0][2]), (r_pivot, c_pivot + 1, segments[1][2])]
-            if self._can_move(new_segments):
-                self.faller['segments'] = new_segments
-                self.faller['orientation'] = 'horizontal'
-                return
-                
-            # Try wall kick (move right)
-            new_segments = [(r_pivot, c_pivot + 1, segments[0][2]), (r_pivot, c_pivot + 2, segments[1][2])]
-            if self._can_move(new_segments):
-                self.faller['segments'] = new_segments
-                self.faller['orientation'] = 'horizontal'
-                return
-                
-            # Try wall kick (move left)
-            new_segments = [(r_pivot, c_pivot - 1, segments[0][2]), (r_pivot, c_pivot, segments[1][2])]
-            if self._can_move(new_segments):
-                self.faller['segments'] = new_segments
-                self.faller['orientation'] = 'horizontal'
-                return
-                
-            # Try wall kick (move down)
-            new_segments = [(r_pivot + 1, c_pivot, segments[0][2]), (r_pivot + 1, c_pivot + 1, segments[1][2])]
-            if self._can_move(new_segments):
-                self.faller['segments'] = new_segments
-                self.faller['orientation'] = 'horizontal'
+        dx = _MOVE_STEPS.get(direction)
+        if dx is not None and self._faller_active and not self._faller_landed:
+            c0, c1 = self._faller_c0 + dx, self._faller_c1 + dx
+            if self._can_move(self._faller_r0, c0, self._faller_r1, c1):
+                self._faller_c0, self._faller_c1 = c0, c1
 
     def rotate_faller(self, direction: str) -> None:
         """
-        Rotates the current faller.
+        Rotates the current faller with wall kick support.
 
         Args:
             direction (str): 'A' for clockwise, 'B' for counterclockwise.
         """
-        if self.faller and not self.faller['landed']:
-            if direction == 'A':
-                self._rotate_clockwise()
-            elif direction == 'B':
-                self._rotate_counterclockwise()
+        if not self._faller_active or self._faller_landed:
+            return
+        kicks = _ROT_KICKS.get((self._faller_horizontal, direction))
+        if kicks is None:
+            return
+
+        r0, c0 = self._faller_r0, self._faller_c0
+        r1, c1 = self._faller_r1, self._faller_c1
+        # The right/bottom segment is the pivot; try each placement in order
+        for dr0, dc0, dr1, dc1, kick in kicks:
+            # A sideways wall kick also needs room for the unrotated faller
+            # shifted over by the kick
+            if kick and not self._can_move(r0, c0 + kick, r1, c1 + kick):
+                continue
+            if self._can_move(r1 + dr0, c1 + dc0, r1 + dr1, c1 + dc1):
+                self._place_faller(r1 + dr0, c1 + dc0, r1 + dr1, c1 + dc1,
+                                   not self._faller_horizontal)
+                return
 
     def apply_gravity(self) -> None:
         """
@@ -293,101 +438,61 @@ class GameState:
         """
         if self.game_over:
             return
-            
-        moved = False
         
         # Handle falling of the current faller
-        if self.faller and not self.faller['landed']:
-            new_segments = [(r + 1, c, color) for r, c, color in self.faller['segments']]
-            if self._can_move(new_segments):
-                self.faller['segments'] = new_segments
-                moved = True
+        if self._faller_active and not self._faller_landed:
+            r0, c0 = self._faller_r0, self._faller_c0
+            r1, c1 = self._faller_r1, self._faller_c1
+            if self._can_move(r0 + 1, c0, r1 + 1, c1):
+                self._faller_r0, self._faller_r1 = r0 + 1, r1 + 1
             else:
                 # Faller has landed
-                self.faller['landed'] = True
-                # Place the faller on the field
-                for r, c, color in self.faller['segments']:
-                    if self.faller['orientation'] == 'horizontal':
-                        left_c = min(c1 for _, c1, _ in self.faller['segments'])
-                        if c == left_c:
-                            self.field[r][c] = f'L{color}'  # Left horizontal
-                        else:
-                            self.field[r][c] = f'R{color}'  # Right horizontal
-                    else:
-                        self.field[r][c] = color  # Vertical is treated as single segments upon landing
-                self.faller = None
-                moved = True
+                self._faller_landed = True
+                # Place the faller on the field; the halves of a horizontal
+                # faller are tagged left and right (segment 0 is always the
+                # left one), and a vertical faller is treated as single
+                # segments upon landing
+                color0, color1 = self._faller_color0, self._faller_color1
+                if self._faller_horizontal:
+                    color0 |= FLAG_LHORIZ
+                    color1 |= FLAG_RHORIZ
+                # Landing overwrites anything added under the faller since
+                # it was placed, viruses included
+                i0, i1 = r0 * self.cols + c0, r1 * self.cols + c1
+                for cell in (self.field[i0], self.field[i1]):
+                    if cell & (FLAG_VIRUS | FLAG_MATCH) == FLAG_VIRUS:
+                        self._virus_count -= 1
+                self.field[i0] = color0
+                self.field[i1] = color1
+                self._unchecked_rows.update((r0, r1))
+                self._unchecked_cols.update((c0, c1))
+                self._faller_active = False
         
-        # Process gravity and matches in a loop to handle cascading effects
-        while True:
-            # Apply gravity to the field
-            field_moved = self._apply_field_gravity()
-            
-            # Process any matches that result from gravity
-            matches_found = self._process_matches()
-            
-            # If nothing moved and no matches were made, we're done
-            if not field_moved and not matches_found and not moved:
-                break
-                
-            moved = True  # Something changed, continue checking for more matches
-            
-            # If we found matches, apply gravity again to fill in the gaps
-            if matches_found:
-                field_moved = self._apply_field_gravity() or field_moved
+        # The field is left at rest after every tick, so unless a cell has
+        # been placed since, there is nothing to settle and no new match
+        if not self._unchecked_rows:
+            return
 
-    def _apply_field_gravity(self) -> bool:
+        # Settle the field and mark the matches. Marked cells stay put, so
+        # only marking one half of a horizontal capsule can let anything
+        # fall further, by freeing the other half; settle again only then
+        freed = True
+        while freed:
+            _, freed, viruses = self._settle_field()
+            self._virus_count -= viruses
+
+    def _settle_field(self) -> Tuple[bool, bool, int]:
         """
-        Applies gravity to all cells in the field, making them fall down if there's space below them.
-        
+        Makes every cell in the field fall as far as it can, then marks every new match for removal.
+
         Returns:
-            bool: True if any cell moved, False otherwise
+            Tuple[bool, bool, int]: Whether any cell moved, whether half of a horizontal
+                capsule was marked, and how many viruses were marked.
         """
-        moved = False
-        
-        # Process from bottom to top, right to left
-        for r in range(self.rows - 2, -1, -1):  # Start from second to last row, go up to top
-            for c in range(self.cols - 1, -1, -1):
-                cell = self.field[r][c]
-                
-                # Skip empty cells and cells that are already marked for removal
-                if cell == ' ' or (isinstance(cell, str) and cell.startswith('*')):
-                    continue
-                    
-                # Handle horizontal pieces
-                is_horizontal = isinstance(cell, str) and len(cell) == 2 and cell[0] in 'LR'
-                if is_horizontal and cell[0] != 'L':
-                    # Only process the left part of horizontal pieces to avoid double-processing
-                    continue
-                
-                # Check if the cell can fall
-                if r < self.rows - 1 and self.field[r + 1][c] == ' ':
-                    # Find the lowest empty cell below
-                    lowest_empty = r + 1
-                    while lowest_empty < self.rows - 1 and self.field[lowest_empty + 1][c] == ' ':
-                        lowest_empty += 1
-                    
-                    # Move the cell down
-                    cell_to_move = self.field[r][c]
-                    self.field[lowest_empty][c] = cell_to_move
-                    self.field[r][c] = ' '
-                    moved = True
-                    
-                    # If this is part of a horizontal piece, move the other part as well
-                    if is_horizontal:
-                        # Find the other part of the horizontal piece
-                        other_c = c + 1  # Since we only process 'L' part, other is always to the right
-                        if 0 <= other_c < self.cols and self.field[r][other_c] != ' ':
-                            # Find the lowest empty cell below for the other part
-                            other_lowest = r + 1
-                            while other_lowest < self.rows - 1 and self.field[other_lowest + 1][other_c] == ' ':
-                                other_lowest += 1
-                            # Move the other part down to the same row as the first part
-                            self.field[other_lowest][other_c] = self.field[r][other_c]
-                            self.field[r][other_c] = ' '
-                            moved = True
-        
-        return moved
+        result = _settle_and_match(self.field, self.rows, self.cols,
+                                   self._unchecked_rows, self._unchecked_cols)
+        self._unchecked_rows, self._unchecked_cols = set(), set()
+        return result
 
     def add_virus(self, row: int, col: int, color: str) -> None:
         """
@@ -398,121 +503,19 @@ class GameState:
             col (int): The column to add the virus to (0-based).
             color (str): The color of the virus ('R', 'B', or 'Y').
         """
-        if 0 <= row < self.rows and 0 <= col < self.cols and self.field[row][col] == ' ':
-            self.field[row][col] = color.lower()  # Viruses are lowercase
-
-    def _check_match(self, row: int, col: int) -> list[tuple[int, int]]:
-        """
-        Check for matches starting from the given position.
-        Returns a list of (row, col) positions that form a match.
-        """
-        if self.field[row][col] == ' ':
-            return []
-            
-        # Get the base color (handling both regular cells and marked cells)
-        cell = self.field[row][col]
-        if isinstance(cell, str) and cell.startswith('*'):
-            color = cell[1:]
-        else:
-            color = cell
-        
-        # Directions: right, down, down-right, down-left
-        directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
-        matches = []
-        
-        for dr, dc in directions:
-            # Check in positive direction
-            cells = [(row, col)]
-            r, c = row + dr, col + dc
-            while 0 <= r < self.rows and 0 <= c < self.cols:
-                cell = self.field[r][c]
-                cell_color = cell[1:] if isinstance(cell, str) and cell.startswith('*') else cell
-                if cell != ' ' and cell_color == color:
-                    cells.append((r, c))
-                    r += dr
-                    c += dc
-                else:
-                    break
-            
-            # Check if we have at least 3 matching cells
-            if len(cells) >= 3:
-                matches.extend(cells)
-        
-        return list(set(matches))  # Remove duplicates in case of overlapping matches
-
-    def _process_matches(self) -> bool:
-        """Process all matches on the field and mark them for removal.
-
-        Returns:
-            bool: True if any matches were found, False otherwise
-        """
-        matches = [[False for _ in range(self.cols)] for _ in range(self.rows)]
-        found_match = False
-
-        # Check for horizontal matches
-        for r in range(self.rows):
-            c = 0
-            while c < self.cols - 1:
-                if (self.field[r][c] != ' ' and
-                        self.field[r][c] == self.field[r][c + 1] and
-                        not self.field[r][c].startswith('*')):
-                    # Found a potential match, check how long it is
-                    match_length = 2
-                    while (c + match_length < self.cols and
-                            self.field[r][c] == self.field[r][c + match_length] and
-                            not self.field[r][c + match_length].startswith('*')):
-                        match_length += 1
-
-                    # If we have a match of 3 or more, mark all cells
-                    if match_length >= 3:
-                        found_match = True
-                        for i in range(match_length):
-                            matches[r][c + i] = True
-                    c += match_length - 1
-                c += 1
-
-        # Check for vertical matches
-        for c in range(self.cols):
-            r = 0
-            while r < self.rows - 1:
-                if (self.field[r][c] != ' ' and 
-                    self.field[r][c] == self.field[r + 1][c] and 
-                    not self.field[r][c].startswith('*')):
-                    # Found a potential match, check how long it is
-                    match_length = 2
-                    while (r + match_length < self.rows and 
-                           self.field[r][c] == self.field[r + match_length][c] and 
-                           not self.field[r + match_length][c].startswith('*')):
-                        match_length += 1
-
-                    # If we have a match of 3 or more, mark all cells
-                    if match_length >= 3:
-                        found_match = True
-                        for i in range(match_length):
-                            matches[r + i][c] = True
-                    r += match_length - 1
-                r += 1
-
-        # Mark all matched cells for removal
-        for r in range(self.rows):
-            for c in range(self.cols):
-                if matches[r][c]:
-                    self.field[r][c] = f'*{self.field[r][c]}'  # Mark for removal
-
-        return found_match
+        if (0 <= row < self.rows and 0 <= col < self.cols and
+                self.field[row * self.cols + col] == EMPTY):
+            self.field[row * self.cols + col] = _COLOR_CODES[color] | FLAG_VIRUS
+            self._virus_count += 1
+            self._unchecked_rows.add(row)
+            self._unchecked_cols.add(col)
 
     def has_viruses(self) -> bool:
         """
-        Checks if there are any viruses remaining in the field.
+        Checks if there are any viruses remaining in the field; a virus marked
+        for removal no longer counts.
 
         Returns:
             bool: True if viruses exist, False otherwise.
         """
-        for row in self.field:
-            for cell in row:
-                if isinstance(cell, str):
-                    # Check for lowercase letter (virus) in the cell
-                    # Handle marked cells (e.g., '*r*') and faller segments (e.g., 'Lr')
-                    if cell.islower() or (len(cell) > 1 and any(c.islower() for c in cell)):
-                        return True
-        return False
+        return self._virus_count > 0